@@ -1,29 +1,77 @@
 from __future__ import annotations
 
 # Standard / third-party imports
+import re
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional, Any, Dict
+from typing import List, Any, Dict
 
 import joblib
-from flask import Flask, request, jsonify, render_template
-from pydantic import BaseModel, ValidationError, field_validator
+import numpy as np
+import orjson
+from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
+from flask_compress import Compress
 
 # Local imports
 from engine import recommend
 from universe import SUPPORTED_GOALS
-from data_sources import get_quote_snapshot  # live stats
+from data_sources import fetch_snapshots  # live stats
 
 # -----------------------------------------------------------------------------
 # Flask app
 # -----------------------------------------------------------------------------
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    jsonify via orjson (C encoder). Types orjson can't handle natively
+    go through Flask's default hook; dumps kwargs (indent, sort_keys) are ignored.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=self.default).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+
+# br/gzip per Accept-Encoding; ticker JSON with names/tags/why compresses well
+app.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
+app.config["COMPRESS_MIN_SIZE"] = 512
+Compress(app)
 
 # -----------------------------------------------------------------------------
 # Intent model loader (single, robust)
 # -----------------------------------------------------------------------------
+# One classifier (the trained TF-IDF + LogisticRegression), three runtimes; the
+# first that loads wins: ONNX graph > exported LR weights > joblib pipeline.
+INTENT_SESS = None  # onnxruntime session over models/intent.onnx
+onnx_path = Path("models/intent.onnx")
+if onnx_path.exists():
+    try:
+        import onnxruntime as ort  # optional: only needed for the ONNX runtime
+
+        INTENT_SESS = ort.InferenceSession(str(onnx_path), providers=["CPUExecutionProvider"])
+        print("Loaded intent ONNX model.")
+    except Exception as e:
+        print("Failed to load intent ONNX model:", e)
+        INTENT_SESS = None
+
+INTENT_LINEAR = None  # (vectorizer, coef, intercept, labels) of the pipeline's LR, saved to models/intent.linear
+linear_path = Path("models/intent.linear")
+if INTENT_SESS is None and linear_path.exists():
+    try:
+        INTENT_LINEAR = joblib.load(linear_path)
+        print("Loaded intent linear weights.")
+    except Exception as e:
+        print("Failed to load intent linear weights:", e)
+        INTENT_LINEAR = None
+
 INTENT_PIPE = None  # scikit pipeline saved to models/intent.pipe
 pipe_path = Path("models/intent.pipe")
-if pipe_path.exists():
+if INTENT_SESS is None and INTENT_LINEAR is None and pipe_path.exists():
     try:
         INTENT_PIPE = joblib.load(pipe_path)
         print("Loaded intent model.")
@@ -31,24 +79,63 @@ if pipe_path.exists():
         print("Failed to load intent model:", e)
         INTENT_PIPE = None
 
-
 # -----------------------------------------------------------------------------
 # Helpers
 # -----------------------------------------------------------------------------
+# The page only uses the variables we pass, so Flask's context processors and
+# signals are skipped. The lookup stays per call: jinja_env caches the compiled
+# template and still honours auto-reload under debug.
+def _render_index(**context: Any) -> str:
+    return app.jinja_env.get_template("index.html").render(goals=SUPPORTED_GOALS, **context)
+
+
+# One comma-separated item, trimmed; internal whitespace is kept
+_ITEM_RE = re.compile(r"[^,\s]+(?:[^,]*[^,\s])?")
+
+
 def _split_list(value: Any) -> List[str]:
     """
     Normalize include/exclude inputs from either JSON or Form.
     Accepts list[str] or comma-separated string, returns trimmed list[str].
     """
-    if value is None:
+    if not value:
         return []
+    if isinstance(value, str):
+        return _ITEM_RE.findall(value)
     if isinstance(value, list):
         return [str(x).strip() for x in value if str(x).strip()]
-    if isinstance(value, str):
-        return [x.strip() for x in value.split(",") if x.strip()]
     return []
 
 
+def _predict_goal(query: str) -> str:
+    """
+    Runs whichever intent runtime loaded (see the loader above). The exported
+    LR weights are scored as TF-IDF @ coef.T + intercept and argmax, which gives
+    the same label as pipe.predict.
+    """
+    if INTENT_SESS is not None:
+        return str(INTENT_SESS.run(None, {"input": np.array([[query]], dtype=object)})[0][0])
+    if INTENT_LINEAR is not None:
+        vectorizer, coef, intercept, labels = INTENT_LINEAR
+        scores = vectorizer.transform([query]) @ coef.T + intercept
+        return labels[scores.argmax()]
+    return INTENT_PIPE.predict([query])[0]
+
+
+@lru_cache(maxsize=4096)
+def _predict_intent(q_norm: str) -> str:
+    """
+    Memoized _predict_goal keyed on the normalized query.
+    lru_cache is safe under threaded WSGI; a racing miss just predicts twice.
+    """
+    return _predict_goal(q_norm)
+
+
+def _normalize_query(q: str) -> str:
+    # TF-IDF lowercases and splits on whitespace anyway, so this keeps predictions identical
+    return " ".join(q.lower().split())
+
+
 def _safe_int(v: Any, default: int = 10) -> int:
     try:
         return int(v)
@@ -56,74 +143,48 @@ def _safe_int(v: Any, default: int = 10) -> int:
         return default
 
 
-def _enrich_with_quotes(tickers: List[Dict[str, Any]]) -> None:
+async def _enrich_with_quotes(tickers: List[Dict[str, Any]]) -> None:
     """
     Mutates each ticker dict, adding price, ret_1y_pct, div_yield_pct.
     """
+    try:
+        snaps = await fetch_snapshots([t["symbol"] for t in tickers])
+    except Exception:
+        snaps = {}
     for t in tickers:
-        try:
-            snap = get_quote_snapshot(t["symbol"])
-        except Exception:
-            snap = {}
+        snap = snaps.get(t["symbol"].upper(), {})
         t["price"] = snap.get("price")
         t["ret_1y_pct"] = snap.get("ret_1y_pct")
         t["div_yield_pct"] = snap.get("div_yield_pct")
 
 
 # -----------------------------------------------------------------------------
-# Request Schemas (pydantic v2)
+# Request validation (hand-rolled: five flat fields don't need a model class)
 # -----------------------------------------------------------------------------
-class RecommendRequest(BaseModel):
-    goal: str
-    risk: str = "medium"                       # "low" | "medium" | "high"
-    include: Optional[List[str]] = []
-    exclude: Optional[List[str]] = []
-    max: int = 10
-
-    @field_validator("risk")
-    @classmethod
-    def _risk_ok(cls, v: str) -> str:
-        v = (v or "").lower()
-        if v not in {"low", "medium", "high"}:
-            raise ValueError("risk must be low|medium|high")
-        return v
-
-    @field_validator("goal")
-    @classmethod
-    def _goal_ok(cls, v: str) -> str:
-        if v not in SUPPORTED_GOALS:
-            raise ValueError(f"goal must be one of: {', '.join(SUPPORTED_GOALS)}")
-        return v
-
-    @field_validator("max")
-    @classmethod
-    def _max_ok(cls, v: int) -> int:
-        if v < 1 or v > 100:
-            raise ValueError("max must be between 1 and 100")
-        return v
-
-
-class SmartRequest(BaseModel):
-    query: str
-    risk: str = "medium"
-    include: Optional[List[str]] = []
-    exclude: Optional[List[str]] = []
-    max: int = 10
-
-    @field_validator("risk")
-    @classmethod
-    def _risk_ok(cls, v: str) -> str:
-        v = (v or "").lower()
-        if v not in {"low", "medium", "high"}:
-            raise ValueError("risk must be low|medium|high")
-        return v
-
-    @field_validator("max")
-    @classmethod
-    def _max_ok(cls, v: int) -> int:
-        if v < 1 or v > 100:
-            raise ValueError("max must be between 1 and 100")
-        return v
+_RISK_SET = frozenset({"low", "medium", "high"})
+SUPPORTED_GOALS_SET = frozenset(SUPPORTED_GOALS)
+
+
+def _value_error(field: str, msg: str, value: Any) -> Dict[str, Any]:
+    # Same keys and msg prefix clients got from pydantic's ValidationError.errors()
+    return {"type": "value_error", "loc": [field], "msg": f"Value error, {msg}", "input": value}
+
+
+def _validate(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Checks risk/max (and goal, when present); lower-cases risk in place.
+    Returns a list of {"type", "loc", "msg", "input"} errors, empty when valid.
+    """
+    errors = []
+    risk = payload["risk"].lower()
+    if risk not in _RISK_SET:
+        errors.append(_value_error("risk", "risk must be low|medium|high", payload["risk"]))
+    payload["risk"] = risk
+    if "goal" in payload and payload["goal"] not in SUPPORTED_GOALS_SET:
+        errors.append(_value_error("goal", f"goal must be one of: {', '.join(SUPPORTED_GOALS)}", payload["goal"]))
+    if payload["max"] < 1 or payload["max"] > 100:
+        errors.append(_value_error("max", "max must be between 1 and 100", payload["max"]))
+    return errors
 
 
 # -----------------------------------------------------------------------------
@@ -131,7 +192,7 @@ class SmartRequest(BaseModel):
 # -----------------------------------------------------------------------------
 @app.get("/health")
 def health():
-    return "OK", 200
+    return jsonify({"status": "OK", "intent_cache": _predict_intent.cache_info()._asdict()}), 200
 
 
 # -----------------------------------------------------------------------------
@@ -139,20 +200,20 @@ def health():
 # -----------------------------------------------------------------------------
 @app.get("/")
 def index():
-    return render_template("index.html", goals=SUPPORTED_GOALS)
+    return _render_index()
 
 
 # -----------------------------------------------------------------------------
 # Core recommend (form + JSON)
 # -----------------------------------------------------------------------------
 @app.post("/recommend")
-def recommend_route():
+async def recommend_route():
     # Parse payload
     if request.is_json:
         body = request.get_json(silent=True) or {}
         payload = {
-            "goal": (body.get("goal") or ""),
-            "risk": (body.get("risk") or "medium"),
+            "goal": str(body.get("goal") or ""),
+            "risk": str(body.get("risk") or "medium"),
             "include": _split_list(body.get("include")),
             "exclude": _split_list(body.get("exclude")),
             "max": _safe_int(body.get("max"), 10),
@@ -167,18 +228,17 @@ def recommend_route():
         }
 
     # Validate
-    try:
-        req = RecommendRequest(**payload)
-    except ValidationError as e:
+    errors = _validate(payload)
+    if errors:
         if request.is_json:
-            return jsonify({"error": e.errors()}), 400
-        return render_template("index.html", goals=SUPPORTED_GOALS, result={"error": "Invalid inputs."}), 400
+            return jsonify({"error": errors}), 400
+        return _render_index(result={"error": "Invalid inputs."}), 400
 
     # Compute
-    tickers, note = recommend(req.goal, req.risk, req.include or [], req.exclude or [], req.max)
+    tickers, note = recommend(payload["goal"], payload["risk"], payload["include"], payload["exclude"], payload["max"])
 
     # Enrich with live stats
-    _enrich_with_quotes(tickers)
+    await _enrich_with_quotes(tickers)
 
     result = {
         "tickers": tickers,
@@ -188,20 +248,20 @@ def recommend_route():
 
     if request.is_json:
         return jsonify(result), 200
-    return render_template("index.html", goals=SUPPORTED_GOALS, result=result, form=req.model_dump())
+    return _render_index(result=result, form=payload)
 
 
 # -----------------------------------------------------------------------------
 # Smart recommend (free-text → predicted goal)
 # -----------------------------------------------------------------------------
 @app.post("/recommend_smart")
-def recommend_smart():
+async def recommend_smart():
     # Parse payload (JSON or form)
     if request.is_json:
         body = request.get_json(silent=True) or {}
         payload = {
-            "query": (body.get("query") or ""),
-            "risk": (body.get("risk") or "medium"),
+            "query": str(body.get("query") or ""),
+            "risk": str(body.get("risk") or "medium"),
             "include": _split_list(body.get("include")),
             "exclude": _split_list(body.get("exclude")),
             "max": _safe_int(body.get("max"), 10),
@@ -221,33 +281,32 @@ def recommend_smart():
         if request.is_json:
             return jsonify({"error": "query required"}), 400
         msg = "Type a query (e.g., 'AI chips', 'automotive EVs', or 'dividend healthcare') before using Smart Recommend."
-        return render_template("index.html", goals=SUPPORTED_GOALS, result={"error": msg}), 200
+        return _render_index(result={"error": msg}), 200
 
     # Validate rest of inputs
-    try:
-        sreq = SmartRequest(**payload)
-    except ValidationError as e:
+    errors = _validate(payload)
+    if errors:
         if request.is_json:
-            return jsonify({"error": e.errors()}), 400
-        return render_template("index.html", goals=SUPPORTED_GOALS, result={"error": "Invalid inputs."}), 400
+            return jsonify({"error": errors}), 400
+        return _render_index(result={"error": "Invalid inputs."}), 400
 
     # Require model
-    if not INTENT_PIPE:
+    if INTENT_PIPE is None and INTENT_SESS is None and INTENT_LINEAR is None:
         if request.is_json:
             return jsonify({"error": "intent model not loaded"}), 500
-        return render_template("index.html", goals=SUPPORTED_GOALS, result={"error": "Intent model not loaded."}), 500
+        return _render_index(result={"error": "Intent model not loaded."}), 500
 
     # Predict goal
     try:
-        predicted_goal = INTENT_PIPE.predict([sreq.query])[0]
+        predicted_goal = _predict_intent(_normalize_query(payload["query"]))
     except Exception as e:
         if request.is_json:
             return jsonify({"error": f"intent prediction failed: {e}"}), 500
-        return render_template("index.html", goals=SUPPORTED_GOALS, result={"error": "Intent prediction failed."}), 500
+        return _render_index(result={"error": "Intent prediction failed."}), 500
 
     # Recommend & enrich
-    tickers, note = recommend(predicted_goal, sreq.risk, sreq.include or [], sreq.exclude or [], sreq.max)
-    _enrich_with_quotes(tickers)
+    tickers, note = recommend(predicted_goal, payload["risk"], payload["include"], payload["exclude"], payload["max"])
+    await _enrich_with_quotes(tickers)
 
     result = {
         "predicted_goal": predicted_goal,
@@ -262,13 +321,13 @@ def recommend_smart():
     # Persist form state into the page
     form_state = {
         "goal": predicted_goal,
-        "risk": sreq.risk,
-        "include": sreq.include,
-        "exclude": sreq.exclude,
-        "max": sreq.max,
-        "query": sreq.query,
+        "risk": payload["risk"],
+        "include": payload["include"],
+        "exclude": payload["exclude"],
+        "max": payload["max"],
+        "query": payload["query"],
     }
-    return render_template("index.html", goals=SUPPORTED_GOALS, result=result, form=form_state)
+    return _render_index(result=result, form=form_state)
 
 
 # -----------------------------------------------------------------------------
@@ -276,4 +335,5 @@ def recommend_smart():
 # -----------------------------------------------------------------------------
 if __name__ == "__main__":
     # Host 0.0.0.0 for container friendliness; keep debug during local dev.
+    # Production: `gunicorn app:app` (settings in gunicorn.conf.py; see README).
     app.run(host="0.0.0.0", port=3000, debug=True)
@@ -0,0 +1,12 @@
+# build_universe.py
+"""
+Rebuild data/universe.pkl from data/universe.csv.
+
+universe.py does this on import whenever the CSV is newer than the pickle;
+run it as a build/deploy step so workers (e.g. gunicorn --preload) start
+from the pickle instead of reparsing the CSV.
+"""
+from universe import build_cache
+
+if __name__ == "__main__":
+    print("Saved", build_cache())
@@ -1,65 +1,221 @@
 # data_sources.py
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+import asyncio
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
 
-import pandas as pd
-import yfinance as yf
+import httpx
+from cachetools import TTLCache
+import numpy as np
 
-# Simple in-memory cache (per-process)
-_CACHE: Dict[str, Dict[str, Any]] = {}
-_TTL = timedelta(minutes=10)
+from universe import KNOWN_SYMBOLS
 
-def _is_stale(ts: datetime) -> bool:
-    return datetime.utcnow() - ts > _TTL
+# Bounded in-memory cache (per-process), entries expire after 10 minutes.
+# TTLCache isn't thread-safe, so every access goes through the lock
+# (gthread workers serve requests on several threads).
+_CACHE: TTLCache = TTLCache(maxsize=4096, ttl=600)
+_CACHE_LOCK = threading.Lock()
 
-def _compute_1y_return(hist: pd.DataFrame) -> Optional[float]:
-    if hist is None or hist.empty or "Close" not in hist or len(hist["Close"]) < 2:
+# Symbols that came back with no history (or hit a 429); short TTL so they retry soon
+_NEG_CACHE: TTLCache = TTLCache(maxsize=4096, ttl=60)
+
+# Disk cache shared by every worker on the host; survives restarts/redeploys.
+# One pickle per (symbol, 10-minute bucket) at <dir>/<bucket>/<SYMBOL>.pkl, so any
+# batch can reuse any other's quotes; old bucket dirs are swept in the background.
+_DISK_DIR = Path(".cache/quotes")
+_BUCKET_SECONDS = 600
+_SWEPT_BUCKET = -1
+
+# Yahoo's chart endpoint returns closes and dividend events in one response
+_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{}"
+_CHART_PARAMS = {"range": "1y", "interval": "1d", "events": "div"}
+_HTTP_HEADERS = {"User-Agent": "Mozilla/5.0"}  # default client UA gets rejected
+_HTTP_TIMEOUT_S = 5.0
+# Requests in flight per fetch_snapshots call; the rest queue and reuse the
+# kept-alive connections. The client can't outlive the call: Flask runs each
+# async view on its own event loop, and httpx connections are bound to one loop.
+_MAX_IN_FLIGHT = 8
+
+def _cache_get(sym: str) -> Optional[Dict[str, Optional[float]]]:
+    with _CACHE_LOCK:
+        try:
+            return _CACHE[sym]
+        except KeyError:
+            return None
+
+def _cache_put(sym: str, data: Dict[str, Optional[float]]) -> None:
+    with _CACHE_LOCK:
+        _CACHE[sym] = data
+
+def _neg_hit(sym: str) -> bool:
+    with _CACHE_LOCK:
+        return sym in _NEG_CACHE
+
+def _remember(sym: str, data: Dict[str, Optional[float]]) -> None:
+    if data["price"] is None:
+        with _CACHE_LOCK:
+            _NEG_CACHE[sym] = True
+    else:
+        _cache_put(sym, data)
+
+def _empty_snapshot() -> Dict[str, Optional[float]]:
+    return {"price": None, "ret_1y_pct": None, "div_yield_pct": None}
+
+def _bucket() -> int:
+    return int(time.time() // _BUCKET_SECONDS)
+
+def _disk_path(sym: str, bucket: int) -> Path:
+    return _DISK_DIR / str(bucket) / f"{sym}.pkl"
+
+def _disk_get(sym: str, bucket: int) -> Optional[Dict[str, Optional[float]]]:
+    try:
+        with _disk_path(sym, bucket).open("rb") as f:
+            data = pickle.load(f)
+    except Exception:
+        return None  # missing, swept or unreadable: a miss
+    return data if isinstance(data, dict) else None
+
+def _disk_put(sym: str, bucket: int, data: Dict[str, Optional[float]]) -> None:
+    """Best effort: write to a temp file and os.replace it, so readers never see a partial entry."""
+    path = _disk_path(sym, bucket)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(data, f, protocol=5)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except OSError:
+        pass  # read-only deploy or a sweep racing us: the memory cache still has it
+
+def _drop_old_buckets(bucket: int) -> None:
+    try:
+        entries = list(os.scandir(_DISK_DIR))
+    except OSError:
+        return
+    for entry in entries:
+        # Keep the previous bucket: requests straddling the rollover may still write to it
+        if entry.name.isdigit() and int(entry.name) < bucket - 1:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+def _sweep(bucket: int) -> None:
+    """Once per bucket per process, drop stale bucket dirs on a background thread."""
+    global _SWEPT_BUCKET
+    if bucket == _SWEPT_BUCKET:
+        return
+    _SWEPT_BUCKET = bucket
+    threading.Thread(target=_drop_old_buckets, args=(bucket,), daemon=True).start()
+
+_YEAR_SECONDS = 365 * 24 * 3600
+
+def _compute_1y_return(closes: np.ndarray) -> Optional[float]:
+    if len(closes) < 2:
         return None
-    start = float(hist["Close"].iloc[0])
-    end   = float(hist["Close"].iloc[-1])
+    start = float(closes[0])
+    end   = float(closes[-1])
     if start == 0:
         return None
     return (end / start - 1.0) * 100.0
 
-def _compute_div_yield(dividends: pd.Series, last_price: Optional[float]) -> Optional[float]:
+def _compute_div_yield(div_dates: np.ndarray, div_amounts: np.ndarray, last_price: Optional[float]) -> Optional[float]:
+    # div_dates: sorted epoch seconds; sum the trailing 12 months of payouts
     if last_price is None or last_price == 0:
         return None
-    if dividends is None or dividends.empty:
+    if len(div_dates) == 0:
         return 0.0
-    cutoff = pd.Timestamp.utcnow() - pd.Timedelta(days=365)
-    last_12m = dividends[dividends.index >= cutoff]
-    ttm = float(last_12m.sum()) if len(last_12m) else 0.0
+    ttm = float(div_amounts[np.searchsorted(div_dates, time.time() - _YEAR_SECONDS):].sum())
     return (ttm / last_price) * 100.0
 
-def get_quote_snapshot(symbol: str) -> Dict[str, Optional[float]]:
-    """
-    Returns: {"price": float|None, "ret_1y_pct": float|None, "div_yield_pct": float|None}
-    Cached for ~10 minutes per symbol.
-    """
-    sym = symbol.upper()
+def _snapshot(closes: np.ndarray, div_dates: np.ndarray, div_amounts: np.ndarray) -> Dict[str, Optional[float]]:
+    price = float(closes[-1]) if len(closes) else None
+    ret_1y = _compute_1y_return(closes)
+    div_yield = _compute_div_yield(div_dates, div_amounts, price)
+    return {"price": price, "ret_1y_pct": ret_1y, "div_yield_pct": div_yield}
 
-    if sym in _CACHE and not _is_stale(_CACHE[sym]["ts"]):
-        return _CACHE[sym]["data"]
+def _partition(symbols: List[str], bucket: int) -> Tuple[Dict[str, Dict[str, Optional[float]]], List[str]]:
+    """Answer what the caches can (unknown, negative, memory, disk); return the rest as stale."""
+    out: Dict[str, Dict[str, Optional[float]]] = {}
+    stale: List[str] = []
+    for sym in dict.fromkeys(s.upper() for s in symbols):
+        if sym not in KNOWN_SYMBOLS or _neg_hit(sym):
+            out[sym] = _empty_snapshot()
+            continue
+        data = _cache_get(sym)
+        if data is None:
+            data = _disk_get(sym, bucket)
+            if data is None:
+                stale.append(sym)
+                continue
+            _cache_put(sym, data)
+        out[sym] = data
+    return out, stale
 
-    tkr = yf.Ticker(sym)
+def _chart_snapshot(payload: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    result = ((payload.get("chart") or {}).get("result") or [None])[0]
+    if not result:
+        return _empty_snapshot()
+    quote = ((result.get("indicators") or {}).get("quote") or [{}])[0]
+    closes = np.array([c for c in quote.get("close") or [] if c is not None], dtype=float)
+    events = sorted(((result.get("events") or {}).get("dividends") or {}).values(), key=lambda e: e["date"])
+    div_dates = np.array([e["date"] for e in events], dtype=float)
+    div_amounts = np.array([e["amount"] for e in events], dtype=float)
+    return _snapshot(closes, div_dates, div_amounts)
 
-    # History for price & 1y return
-    try:
-        hist = tkr.history(period="1y", interval="1d", auto_adjust=False)
-    except Exception:
-        hist = pd.DataFrame()
-
-    price = float(hist["Close"].iloc[-1]) if not hist.empty else None
-    ret_1y = _compute_1y_return(hist) if not hist.empty else None
+async def _fetch_chart(
+    client: httpx.AsyncClient, sym: str, gate: asyncio.Semaphore, throttled: asyncio.Event,
+) -> Optional[Dict[str, Optional[float]]]:
+    """
+    None on transient failure (left uncached); all-None snapshot when Yahoo has
+    no such symbol or is rate limiting us (negative-cached briefly by the caller).
+    After one 429, the symbols still queued are not requested at all.
+    """
+    async with gate:
+        if throttled.is_set():
+            return _empty_snapshot()
+        try:
+            resp = await client.get(_CHART_URL.format(sym), params=_CHART_PARAMS)
+            if resp.status_code == 429:
+                throttled.set()
+                return _empty_snapshot()
+            if resp.status_code == 404:
+                return _empty_snapshot()
+            resp.raise_for_status()
+            return _chart_snapshot(resp.json())
+        except (httpx.HTTPError, ValueError, KeyError, TypeError):
+            return None
 
-    # Dividends → trailing 12m yield
-    try:
-        dividends = tkr.dividends
-    except Exception:
-        dividends = pd.Series(dtype=float)
+async def fetch_snapshots(symbols: List[str]) -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    Returns {SYMBOL: {"price", "ret_1y_pct", "div_yield_pct"}} (floats or None).
+    Answers from the memory/negative/disk caches first, then sends one chart
+    request per stale symbol, up to _MAX_IN_FLIGHT at a time.
+    Symbols outside the universe come back all-None without a network call.
+    """
+    bucket = _bucket()
+    _sweep(bucket)
+    out, stale = _partition(symbols, bucket)
+    if not stale:
+        return out
 
-    div_yield = _compute_div_yield(dividends, price) if price is not None else None
+    gate, throttled = asyncio.Semaphore(_MAX_IN_FLIGHT), asyncio.Event()
+    limits = httpx.Limits(max_connections=_MAX_IN_FLIGHT, max_keepalive_connections=_MAX_IN_FLIGHT)
+    async with httpx.AsyncClient(headers=_HTTP_HEADERS, timeout=_HTTP_TIMEOUT_S, limits=limits) as client:
+        results = await asyncio.gather(*(_fetch_chart(client, sym, gate, throttled) for sym in stale))
 
-    data = {"price": price, "ret_1y_pct": ret_1y, "div_yield_pct": div_yield}
-    _CACHE[sym] = {"data": data, "ts": datetime.utcnow()}
-    return data
+    for sym, data in zip(stale, results):
+        if data is None:
+            out[sym] = _empty_snapshot()
+            continue
+        _remember(sym, data)
+        if data["price"] is not None:
+            _disk_put(sym, bucket, data)
+        out[sym] = data
+    return out
@@ -1,6 +1,9 @@
 # engine.py
 from typing import List, Dict
-from universe import GOALS
+
+import numpy as np
+
+from universe import GOALS, TAG_VOCAB, TAG_MAT
 
 def dedupe_keep_order(items: List[Dict]) -> List[Dict]:
     seen=set(); out=[]
@@ -9,25 +12,6 @@ def dedupe_keep_order(items: List[Dict]) -> List[Dict]:
         seen.add(it["symbol"]); out.append(it)
     return out
 
-def apply_excludes(items: List[Dict], exclude: List[str]) -> List[Dict]:
-    excl={e.lower() for e in (exclude or [])}; out=[]
-    for it in items:
-        tags={t.lower() for t in it.get("tags",[])}
-        if it["symbol"].lower() in excl or tags.intersection(excl): continue
-        out.append(it)
-    return out
-
-def bias_includes(items: List[Dict], include: List[str]) -> List[Dict]:
-    inc={i.lower() for i in (include or [])}
-    scored=[]
-    for it in items:
-        s=0; tags={t.lower() for t in it.get("tags",[])}
-        if tags.intersection(inc): s+=2
-        if it["symbol"].lower() in inc: s+=3
-        scored.append((s,it))
-    scored.sort(key=lambda x:x[0], reverse=True)
-    return [it for _,it in scored]
-
 def apply_risk(items: List[Dict], risk: str) -> List[Dict]:
     if risk=="low":
         scored=[(1 if it["type"]=="ETF" else 0, it) for it in items]
@@ -35,14 +19,56 @@ def apply_risk(items: List[Dict], risk: str) -> List[Dict]:
         return [it for _,it in scored]
     return items
 
+RISKS=("low","medium","high")
+
+DEDUPED={g: dedupe_keep_order(GOALS[g]["core"]) for g in list(GOALS)}
+
+# Final ordering per (goal, risk) when there is nothing to include/exclude
+PRECOMP={(g,r): apply_risk(DEDUPED[g], r) for g in DEDUPED for r in RISKS}
+
+def _goal_arrays(goal: str):
+    """Tag matrix rows, lower-cased symbols and ETF flags aligned with DEDUPED[goal]."""
+    pos={id(it): i for i,it in enumerate(GOALS[goal]["core"])}
+    items=DEDUPED[goal]
+    rows=np.array([pos[id(it)] for it in items], dtype=np.intp)
+    syms=np.array([it["_sym_lc"] for it in items], dtype=object)
+    etf=np.array([it["type"]=="ETF" for it in items], dtype=bool)
+    return TAG_MAT[goal][rows], syms, etf
+
+ARRAYS={g: _goal_arrays(g) for g in DEDUPED}
+
+def _vocab_mask(terms) -> np.ndarray:
+    mask=np.zeros(len(TAG_VOCAB), dtype=bool)
+    mask[[TAG_VOCAB[t] for t in terms if t in TAG_VOCAB]]=True
+    return mask
+
+def top_k(goal: str, risk: str, include: List[str], exclude: List[str], k: int) -> List[Dict]:
+    """
+    Vectorized over DEDUPED[goal]: one sparse mat-vec per include/exclude set,
+    then argpartition for the k best by (ETF when risk is low, include bonus,
+    earlier position) -- same order as sorting by include bonus then by risk.
+    """
+    mat,syms,etf=ARRAYS[goal]; n=len(syms)
+    excl=list({e.lower() for e in (exclude or [])})
+    inc=list({i.lower() for i in (include or [])})
+    alive=np.flatnonzero(~((mat @ _vocab_mask(excl)) | np.isin(syms, excl)))
+    bonus=2*(mat @ _vocab_mask(inc)).astype(np.int64) + 3*np.isin(syms, inc)
+    if risk=="low": bonus+=6*etf
+    # Unique composite so ties fall back to original position
+    score=bonus*n + (n-1-np.arange(n))
+    if k<len(alive):
+        alive=alive[np.argpartition(-score[alive], k-1)[:k]]
+    best=alive[np.argsort(-score[alive])]
+    return [DEDUPED[goal][i] for i in best]
+
 def recommend(goal: str, risk: str, include: List[str], exclude: List[str], k: int):
     if goal not in GOALS: return [], "Unknown goal."
-    base=dedupe_keep_order(GOALS[goal]["core"][:])
-    base=apply_excludes(base, exclude)
-    base=bias_includes(base, include)
-    base=apply_risk(base, risk)
+    if not include and not exclude and (goal,risk) in PRECOMP:
+        base=PRECOMP[(goal,risk)][:k]
+    else:
+        base=top_k(goal, risk, include, exclude, k)
     out=[]
-    for it in base[:k]:
+    for it in base:
         why=["matches "+goal.replace("_"," ")]
         if risk=="low" and it["type"]=="ETF": why.append("ETF favored for low risk")
         if it.get("tags"): why.append("tags: "+", ".join(it["tags"][:2]))
@@ -0,0 +1,12 @@
+# gunicorn.conf.py: picked up automatically when gunicorn starts in app/:
+#   cd app && gunicorn app:app
+# Threaded workers: each request runs its async view on its own event loop.
+# Don't switch to -k gevent: patched threads put every greenlet on one OS
+# thread, and asgiref then rejects concurrent async views.
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:3000")
+worker_class = "gthread"
+workers = int(os.environ.get("WEB_CONCURRENCY", "4"))
+threads = int(os.environ.get("GUNICORN_THREADS", "8"))
+timeout = 30
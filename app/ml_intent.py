@@ -4,6 +4,12 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
 import joblib, os
 
+try:  # optional: only needed to export models/intent.onnx
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import StringTensorType
+except ImportError:
+    convert_sklearn = None
+
 # Labeled phrases -> your internal goal keys (match your CSV goals)
 TRAIN = [
     ("safe stable low risk index broad market dividend quality", "safe_stable"),
@@ -57,6 +63,29 @@ pipe = Pipeline([
 
 pipe.fit(X, y)
 
+# The fitted LR's weights, so the app can score with one sparse dot + argmax
+# (same labels as pipe.predict, without the pipeline's per-call dispatch)
+vectorizer = pipe.named_steps["tfidf"]
+clf = pipe.named_steps["clf"]
+labels = [str(c) for c in clf.classes_]
+
 os.makedirs("models", exist_ok=True)
 joblib.dump(pipe, "models/intent.pipe")
-print("Saved models/intent.pipe with classes:", sorted(set(y)))
+joblib.dump((vectorizer, clf.coef_, clf.intercept_, labels), "models/intent.linear")
+
+print("Saved models/intent.pipe and models/intent.linear with classes:", labels)
+
+# Same pipeline as an ONNX graph; the app prefers it when onnxruntime is installed
+if convert_sklearn is not None:
+    # Pin the lower-casing locale: the converter's en_US.UTF-8 default is often
+    # missing from slim containers and the session then fails to load
+    onx = convert_sklearn(
+        pipe,
+        initial_types=[("input", StringTensorType([None, 1]))],
+        options={TfidfVectorizer: {"locale": "C.UTF-8"}},
+    )
+    with open("models/intent.onnx", "wb") as f:
+        f.write(onx.SerializeToString())
+    print("Saved models/intent.onnx")
+else:
+    print("skl2onnx not installed; skipped models/intent.onnx")
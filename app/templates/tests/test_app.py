@@ -0,0 +1,44 @@
+# test_app.py
+# JSON validation errors keep the shape clients parsed from pydantic's
+# ValidationError.errors(): {"type", "loc", "msg", "input"} per field.
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # app/
+
+import app as app_module
+
+@pytest.fixture
+def client(monkeypatch):
+    async def no_quotes(symbols):
+        return {}
+    monkeypatch.setattr(app_module, "fetch_snapshots", no_quotes)
+    return app_module.app.test_client()
+
+def test_recommend_json_400_error_entries(client):
+    r=client.post("/recommend", json={"goal":"nope", "risk":"extreme", "max":0})
+    assert r.status_code == 400
+    errors=r.get_json()["error"]
+    assert [e["loc"] for e in errors] == [["risk"], ["goal"], ["max"]]
+    for e in errors:
+        assert set(e) == {"type", "loc", "msg", "input"}
+        assert e["type"] == "value_error"
+        assert e["msg"].startswith("Value error, ")
+    assert [e["input"] for e in errors] == ["extreme", "nope", 0]
+    assert errors[0]["msg"] == "Value error, risk must be low|medium|high"
+    assert errors[2]["msg"] == "Value error, max must be between 1 and 100"
+
+def test_recommend_json_400_single_field(client):
+    r=client.post("/recommend", json={"goal":"dividends", "risk":"medium", "max":101})
+    assert r.status_code == 400
+    assert r.get_json() == {"error": [{"type": "value_error", "loc": ["max"],
+                                       "msg": "Value error, max must be between 1 and 100", "input": 101}]}
+
+def test_risk_is_lower_cased(client):
+    r=client.post("/recommend", json={"goal":"dividends", "risk":"LOW", "max":3})
+    assert r.status_code == 200
+    tickers=r.get_json()["tickers"]
+    assert tickers and tickers[0]["type"] == "ETF"
+    assert "ETF favored for low risk" in tickers[0]["why"]
@@ -0,0 +1,103 @@
+# test_data_sources.py
+# fetch_snapshots against a mocked Yahoo chart endpoint: payload parsing,
+# negative/transient caching, and the memory/disk partition.
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # app/
+
+import data_sources as D
+
+DAY=86400
+
+def _payload(closes, dividends=None):
+    result={"indicators":{"quote":[{"close":closes}]}}
+    if dividends is not None:
+        result["events"]={"dividends":{str(d):{"amount":a,"date":d} for d,a in dividends}}
+    return {"chart":{"result":[result],"error":None}}
+
+@pytest.fixture
+def yahoo(monkeypatch, tmp_path):
+    """Route chart requests to `routes[SYMBOL]` (a Response or an exception); record calls."""
+    monkeypatch.setattr(D, "_DISK_DIR", tmp_path)
+    D._CACHE.clear(); D._NEG_CACHE.clear()
+    routes, calls={}, []
+    def handler(req):
+        sym=req.url.path.rsplit("/",1)[1]; calls.append(sym)
+        route=routes[sym]
+        if isinstance(route, Exception): raise route
+        return route
+    client=httpx.AsyncClient
+    monkeypatch.setattr(D.httpx, "AsyncClient", lambda **kw: client(transport=httpx.MockTransport(handler), **kw))
+    yield routes, calls
+    D._CACHE.clear(); D._NEG_CACHE.clear()
+
+def _fetch(*syms):
+    return asyncio.run(D.fetch_snapshots(list(syms)))
+
+def test_normal_payload(yahoo):
+    routes, calls=yahoo
+    now=int(time.time())
+    # One payout inside the trailing year, one outside; a None close is skipped
+    routes["AAPL"]=httpx.Response(200, json=_payload([100.0, None, 125.0], [(now-400*DAY, 9.0), (now-30*DAY, 2.5)]))
+    snap=_fetch("aapl")["AAPL"]
+    assert snap["price"] == 125.0
+    assert snap["ret_1y_pct"] == pytest.approx(25.0)
+    assert snap["div_yield_pct"] == pytest.approx(2.0)
+    assert calls == ["AAPL"]
+
+def test_no_dividends_is_zero_yield(yahoo):
+    routes, _=yahoo
+    routes["MSFT"]=httpx.Response(200, json=_payload([50.0, 55.0]))
+    assert _fetch("MSFT")["MSFT"] == {"price": 55.0, "ret_1y_pct": pytest.approx(10.0), "div_yield_pct": 0.0}
+
+def test_all_none_closes_is_negative_cached(yahoo):
+    routes, calls=yahoo
+    routes["SCHD"]=httpx.Response(200, json=_payload([None, None]))
+    assert _fetch("SCHD")["SCHD"] == D._empty_snapshot()
+    assert _fetch("SCHD")["SCHD"] == D._empty_snapshot()
+    assert calls == ["SCHD"]
+
+def test_404_is_negative_cached(yahoo):
+    routes, calls=yahoo
+    routes["VYM"]=httpx.Response(404)
+    assert _fetch("VYM")["VYM"] == D._empty_snapshot()
+    _fetch("VYM")
+    assert calls == ["VYM"]
+
+@pytest.mark.parametrize("failure", [httpx.Response(503), httpx.ReadTimeout("slow")])
+def test_transient_failure_is_not_cached(yahoo, failure):
+    routes, calls=yahoo
+    routes["NVDA"]=failure
+    assert _fetch("NVDA")["NVDA"] == D._empty_snapshot()
+    routes["NVDA"]=httpx.Response(200, json=_payload([10.0, 20.0]))
+    assert _fetch("NVDA")["NVDA"]["price"] == 20.0
+    assert calls == ["NVDA", "NVDA"]
+
+def test_cache_hits_make_no_requests(yahoo):
+    routes, calls=yahoo
+    routes["AAPL"]=httpx.Response(200, json=_payload([1.0, 2.0]))
+    first=_fetch("AAPL")
+    assert _fetch("AAPL", "aapl") == first  # memory
+    D._CACHE.clear()
+    assert _fetch("AAPL") == first  # disk
+    assert calls == ["AAPL"]
+
+def test_unknown_symbol_makes_no_request(yahoo):
+    _, calls=yahoo
+    assert _fetch("NOT-A-TICKER") == {"NOT-A-TICKER": D._empty_snapshot()}
+    assert calls == []
+
+def test_429_stops_the_batch_and_backs_off(yahoo, monkeypatch):
+    routes, calls=yahoo
+    monkeypatch.setattr(D, "_MAX_IN_FLIGHT", 1)
+    syms=["AAPL", "MSFT", "NVDA"]
+    for s in syms: routes[s]=httpx.Response(429)
+    assert all(v == D._empty_snapshot() for v in _fetch(*syms).values())
+    _fetch(*syms)
+    assert len(calls) == 1
@@ -0,0 +1,92 @@
+# test_engine.py
+# Regression check: the vectorized recommend() must order results exactly like
+# the original list pipeline (dedupe -> excludes -> include bias -> risk -> slice).
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # app/
+
+from engine import recommend
+from universe import GOALS
+
+def _baseline(goal, risk, include, exclude, k):
+    if goal not in GOALS: return [], "Unknown goal."
+    seen=set(); base=[]
+    for it in GOALS[goal]["core"]:
+        if it["symbol"] in seen: continue
+        seen.add(it["symbol"]); base.append(it)
+    excl={e.lower() for e in exclude}
+    base=[it for it in base
+          if it["symbol"].lower() not in excl and not {t.lower() for t in it["tags"]} & excl]
+    inc={i.lower() for i in include}
+    def bias(it):
+        return (2 if {t.lower() for t in it["tags"]} & inc else 0) + (3 if it["symbol"].lower() in inc else 0)
+    base=sorted(base, key=bias, reverse=True)
+    if risk=="low": base=sorted(base, key=lambda it: it["type"]=="ETF", reverse=True)
+    out=[]
+    for it in base[:k]:
+        why=["matches "+goal.replace("_"," ")]
+        if risk=="low" and it["type"]=="ETF": why.append("ETF favored for low risk")
+        if it["tags"]: why.append("tags: "+", ".join(it["tags"][:2]))
+        out.append({"symbol":it["symbol"],"name":it["name"],"type":it["type"],"why":"; ".join(why)})
+    return out, GOALS[goal].get("note","")
+
+def _first(goal, field):
+    return next(it for it in GOALS[goal]["core"] if it[field])
+
+def test_plain_goal_and_unknown_goal():
+    for goal in list(GOALS)+["nope"]:
+        for risk in ("low","medium","high"):
+            assert recommend(goal, risk, [], [], 10) == _baseline(goal, risk, [], [], 10)
+
+def test_include_symbol_and_tag():
+    for goal, g in GOALS.items():
+        last=g["core"][-1]
+        include=[last["symbol"].lower(), last["tags"][0].upper()] if last["tags"] else [last["symbol"]]
+        for risk in ("low","high"):
+            assert recommend(goal, risk, include, [], 5) == _baseline(goal, risk, include, [], 5)
+
+def test_symbol_match_outranks_tag_match():
+    for goal, g in GOALS.items():
+        last=g["core"][-1]
+        tag=next((t for it in g["core"] for t in it["tags"] if t not in last["tags"]), None)
+        if tag is None: continue
+        include=[tag, last["symbol"]]
+        got=recommend(goal, "high", include, [], 100)
+        assert got == _baseline(goal, "high", include, [], 100)
+        assert got[0][0]["symbol"] == last["symbol"]
+
+def test_exclude_symbol_and_tag():
+    for goal, g in GOALS.items():
+        it=_first(goal, "tags")
+        exclude=[g["core"][0]["symbol"], it["tags"][0].upper()]
+        for risk in ("low","medium"):
+            got=recommend(goal, risk, [], exclude, 10)
+            assert got == _baseline(goal, risk, [], exclude, 10)
+            assert g["core"][0]["symbol"] not in {t["symbol"] for t in got[0]}
+
+def test_low_risk_puts_etfs_first():
+    for goal in GOALS:
+        types=[t["type"] for t in recommend(goal, "low", [], [], 100)[0]]
+        assert types == sorted(types, key=lambda t: t!="ETF")
+
+def test_k_larger_than_candidates():
+    for goal, g in GOALS.items():
+        got, _=recommend(goal, "medium", [], [], 1000)
+        assert len(got) == len({it["symbol"] for it in g["core"]})
+        assert (got, _) == _baseline(goal, "medium", [], [], 1000)
+
+def test_random_mixes_match_baseline():
+    rng=random.Random(7)
+    tags=sorted({t for g in GOALS.values() for it in g["core"] for t in it["tags"]})
+    syms=sorted({it["symbol"] for g in GOALS.values() for it in g["core"]})
+    pool=tags+syms+["nothing-matches"]
+    for _ in range(500):
+        goal=rng.choice(list(GOALS))
+        own=[t for it in GOALS[goal]["core"] for t in it["tags"]+[it["symbol"]]]
+        risk=rng.choice(("low","medium","high"))
+        include=[x.upper() if rng.random()<.3 else x for x in rng.sample(own+pool, rng.randint(0,3))]
+        exclude=rng.sample(own+pool, rng.randint(0,3))
+        k=rng.choice((1,3,10,100))
+        assert recommend(goal, risk, include, exclude, k) == _baseline(goal, risk, include, exclude, k)
@@ -1,11 +1,21 @@
 # universe.py
 import csv
+import hashlib
+import os
+import pickle
+import tempfile
 from collections import defaultdict
 from pathlib import Path
 
+import numpy as np
+from scipy.sparse import csr_matrix
+
 DATA_PATH = Path(__file__).parent / "data" / "universe.csv"
 
-GOALS = defaultdict(lambda: {"core": [], "note": ""})
+# Parsed + derived structures, reused while newer than the CSV (see build_universe.py).
+# The key also hashes this file, so edits to NOTES or the parsing code invalidate it.
+CACHE_PATH = DATA_PATH.with_suffix(".pkl")
+_CACHE_VERSION = (2, hashlib.sha256(Path(__file__).read_bytes()).hexdigest())
 
 NOTES = {
   "information_technology": "Software, semis, and IT services; higher growth & volatility.",
@@ -21,18 +31,86 @@ NOTES = {
   "communication_services": "Search, social, streaming, telecom; ads & subscriptions.",
 }
 
-with DATA_PATH.open(newline="", encoding="utf-8") as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        goal = row["goal"].strip()
-        tags = [t.strip() for t in row["tags"].split(",") if t.strip()]
-        GOALS[goal]["core"].append({
-            "symbol": row["symbol"].strip(),
-            "name": row["name"].strip(),
-            "type": row["type"].strip(),  # "ETF" or "Stock"
-            "tags": tags,
-        })
-        if not GOALS[goal]["note"]:
-            GOALS[goal]["note"] = NOTES.get(goal, "")
-
-SUPPORTED_GOALS = list(GOALS.keys())
+def _parse_goals():
+    goals = defaultdict(lambda: {"core": [], "note": ""})
+    with DATA_PATH.open(newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            goal = row["goal"].strip()
+            tags = [t.strip() for t in row["tags"].split(",") if t.strip()]
+            goals[goal]["core"].append({
+                "symbol": row["symbol"].strip(),
+                "name": row["name"].strip(),
+                "type": row["type"].strip(),  # "ETF" or "Stock"
+                "tags": tags,
+                # Lower-cased copies for engine's include/exclude matching
+                "_sym_lc": row["symbol"].strip().lower(),
+                "_tags_lc": frozenset(t.lower() for t in tags),
+            })
+            if not goals[goal]["note"]:
+                goals[goal]["note"] = NOTES.get(goal, "")
+    return dict(goals)  # plain dict so it pickles
+
+def _tag_matrix(items, vocab):
+    cells = [(i, vocab[t]) for i, it in enumerate(items) for t in it["_tags_lc"]]
+    rows = [r for r, _ in cells]
+    cols = [c for _, c in cells]
+    return csr_matrix((np.ones(len(cells), dtype=bool), (rows, cols)), shape=(len(items), len(vocab)))
+
+def _build():
+    goals = _parse_goals()
+    vocab = {t: i for i, t in enumerate(sorted({t for g in goals.values() for it in g["core"] for t in it["_tags_lc"]}))}
+    return {
+        "version": _CACHE_VERSION,
+        "GOALS": goals,
+        "SUPPORTED_GOALS": list(goals.keys()),
+        "KNOWN_SYMBOLS": frozenset(it["symbol"].upper() for g in goals.values() for it in g["core"]),
+        "TAG_VOCAB": vocab,
+        "TAG_MAT": {goal: _tag_matrix(g["core"], vocab) for goal, g in goals.items()},
+    }
+
+def _write_cache(data, path: Path) -> None:
+    # Unique temp file per writer (workers race here at startup), same directory
+    # so os.replace is atomic: concurrent workers never read a half-written file
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(data, f, protocol=5)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def build_cache(path: Path = CACHE_PATH) -> Path:
+    """Parse the CSV and write the derived structures to `path` (pickle protocol 5)."""
+    _write_cache(_build(), path)
+    return path
+
+def _load():
+    try:
+        if CACHE_PATH.stat().st_mtime >= DATA_PATH.stat().st_mtime:
+            with CACHE_PATH.open("rb") as f:
+                data = pickle.load(f)
+            if data.get("version") == _CACHE_VERSION:
+                return data
+    except Exception:
+        pass  # missing, truncated or unloadable pickle: rebuild below
+    data = _build()
+    try:
+        _write_cache(data, CACHE_PATH)
+    except OSError:
+        pass  # read-only deploy: just use the fresh parse
+    return data
+
+_DATA = _load()
+
+GOALS = _DATA["GOALS"]
+SUPPORTED_GOALS = _DATA["SUPPORTED_GOALS"]
+
+# Every tradable symbol we know about; quote lookups reject anything else up front
+KNOWN_SYMBOLS = _DATA["KNOWN_SYMBOLS"]
+
+# Sparse tag incidence per goal: TAG_MAT[goal][i, TAG_VOCAB[tag]] is True when
+# GOALS[goal]["core"][i] carries that (lower-cased) tag
+TAG_VOCAB = _DATA["TAG_VOCAB"]
+TAG_MAT = _DATA["TAG_MAT"]